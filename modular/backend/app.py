@@ -0,0 +1,68 @@
+from flask import Flask
+from flask_cors import CORS
+from flask_restful import Api
+from werkzeug.security import generate_password_hash
+
+from config import Config
+from extensions import db, jwt
+from models import User
+from routes import register_routes
+
+
+# ==========================
+# Application Factory
+# ==========================
+# Only the core (database, JWT, REST routes, CORS) is wired up here. Mail,
+# Celery, the Redis cache and the upload directory are created on first use
+# through the getters in extensions.py, so importing this module and building
+# the app never touches SMTP, Redis or the filesystem.
+def create_app(config_object=Config):
+    # Create a Flask web application
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+
+    # Bind the core extensions to this app
+    db.init_app(app)
+    jwt.init_app(app)
+
+    # Initialize Flask-RESTful API and register the resources
+    api = Api(app)
+    register_routes(api)
+
+    # Enable Cross-Origin Resource Sharing (CORS) for all routes
+    CORS(app, resources={r"/*": {"origins": "*"}})
+
+    return app
+
+
+# Function to create an initial admin user if one doesn't exist
+def create_admin(app):
+    # Ensure operations run within the Flask application context
+    with app.app_context():
+        # Create all database tables defined in the models
+        db.create_all()
+        # Check if an admin user already exists
+        admin = User.query.filter_by(role='admin').first()
+        # If no admin user found, create one
+        if not admin:
+            admin = User(
+                username='admin',
+                email='admin@mail.com',
+                password=generate_password_hash('admin@123'),
+                role='admin',
+                is_approved=True # Admin user is automatically approved
+            )
+            # Add the admin user to the database session
+            db.session.add(admin)
+            # Save changes to the database
+            db.session.commit()
+            print("Default admin user created.")
+
+
+# Run the Flask application
+if __name__ == '__main__':
+    app = create_app()
+    # Create the default admin user when the application starts
+    create_admin(app)
+    # Run the app in debug mode (good for development, set to False in production)
+    app.run(debug=True)
@@ -0,0 +1,65 @@
+import argparse
+import threading
+import time
+
+from app import create_app
+from config import Config
+from notifications import compile_templates, run_bulk_job
+from smtp_sink import start_sink
+
+
+# ==========================
+# Bulk Email Throughput Benchmark
+# ==========================
+# Sends templated messages to a local SMTP sink and reports messages per second.
+# Usage: python bench_bulk_email.py --count 2000 --pool 8 --rate 0
+def main():
+    parser = argparse.ArgumentParser(description='Measure bulk notification throughput against a local SMTP sink.')
+    parser.add_argument('--count', type=int, default=1000, help='number of recipients')
+    parser.add_argument('--pool', type=int, default=4, help='number of parallel SMTP connections')
+    parser.add_argument('--rate', type=float, default=0, help='messages per second limit (0 = unthrottled)')
+    args = parser.parse_args()
+
+    sink = start_sink()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        MAIL_SERVER = 'localhost'
+        MAIL_PORT = sink.server_address[1]
+        MAIL_USE_TLS = False
+        MAIL_USERNAME = None
+        MAIL_PASSWORD = None
+        MAIL_DEFAULT_SENDER = 'bench@localhost'
+        MAIL_BULK_POOL_SIZE = args.pool
+        MAIL_BULK_RATE_LIMIT = args.rate
+        MAIL_BULK_RETRY_DELAY = 0.1
+
+    app = create_app(BenchConfig)
+    subject_template, body_template = compile_templates(
+        'Task reassigned: {{ task }}',
+        'Hi {{ username }},\n\nThe task "{{ task }}" is now assigned to you.'
+    )
+    recipients = [
+        {'email': f'user{i}@example.com', 'username': f'user{i}', 'task': f'Task {i}'}
+        for i in range(args.count)
+    ]
+
+    # Count results in memory so the benchmark does not need Redis
+    counts = {'sent': 0, 'failed': 0}
+    counts_lock = threading.Lock()
+
+    def mark(email, status, error=None):
+        with counts_lock:
+            counts[status] += 1
+
+    start = time.perf_counter()
+    run_bulk_job(app, recipients, subject_template, body_template, mark)
+    elapsed = time.perf_counter() - start
+
+    print(f"sent {counts['sent']}, failed {counts['failed']}, sink received {sink.received}")
+    print(f"{elapsed:.2f}s, {counts['sent'] / elapsed:.0f} messages/s with {args.pool} connections")
+    sink.shutdown()
+
+
+if __name__ == '__main__':
+    main()
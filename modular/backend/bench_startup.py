@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+# ==========================
+# Startup-Time Benchmark
+# ==========================
+# Every sample runs in a fresh interpreter so nothing is already imported.
+# Usage: python bench_startup.py --runs 10
+PROBE = r'''
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+response = app.test_client().get('/')
+t3 = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    'import': t1 - t0,
+    'create_app': t2 - t1,
+    'first_request': t3 - t2,
+    'total': t3 - t0,
+}))
+'''
+
+
+def run_probe():
+    # Run the probe next to app.py so the modules resolve the same way as `python app.py`
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=here, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import time and time to first request.')
+    parser.add_argument('--runs', type=int, default=10, help='number of fresh interpreters to sample')
+    args = parser.parse_args()
+
+    samples = [run_probe() for _ in range(args.runs)]
+    print(f"{'phase':<15}{'median ms':>12}{'min ms':>12}{'max ms':>12}")
+    for phase in ('import', 'create_app', 'first_request', 'total'):
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f"{phase:<15}{statistics.median(values):>12.1f}{min(values):>12.1f}{max(values):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import os
+
+
+# ==========================
+# Application Configuration
+# ==========================
+# Plain settings only: nothing here imports or connects to an optional
+# subsystem, so loading the config is as cheap as reading a few env vars.
+class Config:
+    # Configure the database to use SQLite and name the file 'project.db'
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///project.db')
+    # Set a secret key for JWT (JSON Web Token) for security
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'aStrongSecretKey')
+
+    # Flask-Mail settings (used the first time mail is sent)
+    MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+    MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
+    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', '1') == '1'
+    MAIL_USERNAME = os.getenv('MAIL_USER')
+    MAIL_PASSWORD = os.getenv('MAIL_PASS')
+    MAIL_DEFAULT_SENDER = os.getenv('MAIL_USER')
+    # Seconds to wait on the SMTP server before giving up on a connection
+    MAIL_TIMEOUT = float(os.getenv('MAIL_TIMEOUT', 30))
+    # Bulk notifications: number of SMTP connections kept open in parallel and
+    # the provider's sending limit in messages per second (0 disables throttling),
+    # shared by every bulk job running in the worker process
+    MAIL_BULK_POOL_SIZE = int(os.getenv('MAIL_BULK_POOL_SIZE', 4))
+    MAIL_BULK_RATE_LIMIT = float(os.getenv('MAIL_BULK_RATE_LIMIT', 5))
+    # Temporary (4xx) failures and dropped connections are retried this many
+    # times, waiting MAIL_BULK_RETRY_DELAY seconds and doubling each time
+    MAIL_BULK_MAX_RETRIES = int(os.getenv('MAIL_BULK_MAX_RETRIES', 3))
+    MAIL_BULK_RETRY_DELAY = float(os.getenv('MAIL_BULK_RETRY_DELAY', 5))
+    # Celery queue for bulk jobs, consumed by a single worker process
+    MAIL_BULK_QUEUE = os.getenv('MAIL_BULK_QUEUE', 'bulk_email')
+
+    # Celery settings (used the first time a task is queued or a worker starts)
+    # (from_object() only loads upper case names into app.config)
+    CELERY_BROKER_URL = os.getenv('BROKER_URL', 'redis://localhost:6379/0')
+    CELERY_RESULT_BACKEND = os.getenv('RESULT_BACKEND', 'redis://localhost:6379/0')
+    # Run tasks in the calling process instead of on a worker (tests only)
+    CELERY_TASK_ALWAYS_EAGER = False
+
+    # Redis cache settings (used the first time the cache is touched)
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Directory to save uploaded documents (created on the first upload)
+    UPLOAD_FOLDER = os.getenv(
+        'UPLOAD_FOLDER',
+        os.path.abspath(os.path.join(os.path.dirname(__file__), '../../uploads'))
+    )
@@ -0,0 +1,100 @@
+import os
+import threading
+
+from flask import current_app
+from flask_jwt_extended import JWTManager
+from flask_sqlalchemy import SQLAlchemy
+
+# Core extensions: cheap to build, bound to the app in create_app()
+db = SQLAlchemy()
+jwt = JWTManager()
+
+# Guard the first-use initialization below when several threads of the same
+# worker hit a cold subsystem at the same time. There is one lock per key, so
+# a factory may call the getter of another subsystem (the bulk email task
+# builds Celery first); it must not call its own getter.
+_init_locks = {}
+_init_locks_guard = threading.Lock()
+
+
+def _init_lock(key):
+    with _init_locks_guard:
+        return _init_locks.setdefault(key, threading.Lock())
+
+
+def get_or_create(app, key, factory):
+    """Build factory(app) once per app and keep it in app.extensions[key]."""
+    if key not in app.extensions:
+        with _init_lock(key):
+            if key not in app.extensions:
+                app.extensions[key] = factory(app)
+    return app.extensions[key]
+
+
+# ==========================
+# Lazy Subsystems
+# ==========================
+def _create_mail(app):
+    # Flask-Mail is only imported once something actually sends mail
+    from flask_mail import Mail
+    return Mail(app).state
+
+
+def _create_celery(app):
+    from celery import Celery
+
+    celery_app = Celery(
+        app.import_name,
+        broker=app.config['CELERY_BROKER_URL'],
+        backend=app.config['CELERY_RESULT_BACKEND']
+    )
+    celery_app.conf.update(
+        broker_url=app.config['CELERY_BROKER_URL'],
+        result_backend=app.config['CELERY_RESULT_BACKEND'],
+        broker_connection_retry_on_startup=True,  # Fix Celery 6.0 deprecation warning
+        task_always_eager=app.config.get('CELERY_TASK_ALWAYS_EAGER', False)
+    )
+
+    # Run every task inside the Flask application context
+    class ContextTask(celery_app.Task):
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return super().__call__(*args, **kwargs)
+
+    celery_app.Task = ContextTask
+    return celery_app
+
+
+def _create_cache(app):
+    import redis
+    return redis.StrictRedis.from_url(app.config['REDIS_URL'], decode_responses=True)
+
+
+def _create_storage(app):
+    upload_folder = app.config['UPLOAD_FOLDER']
+    os.makedirs(upload_folder, exist_ok=True)
+    return upload_folder
+
+
+def get_mail(app=None):
+    """Return the Flask-Mail state for the app, creating it on first use."""
+    app = app or current_app._get_current_object()
+    return get_or_create(app, 'lazy_mail', _create_mail)
+
+
+def get_celery(app=None):
+    """Return the Celery app bound to the Flask app, creating it on first use."""
+    app = app or current_app._get_current_object()
+    return get_or_create(app, 'lazy_celery', _create_celery)
+
+
+def get_cache(app=None):
+    """Return the Redis client, creating it on first use."""
+    app = app or current_app._get_current_object()
+    return get_or_create(app, 'lazy_cache', _create_cache)
+
+
+def get_upload_folder(app=None):
+    """Return the upload directory, creating it on first use."""
+    app = app or current_app._get_current_object()
+    return get_or_create(app, 'lazy_storage', _create_storage)
@@ -0,0 +1,56 @@
+from extensions import db
+
+
+# Define the User model for the database
+class User(db.Model):
+    # Unique ID for each user
+    id = db.Column(db.Integer, primary_key=True)
+    # User's username, must be unique and cannot be empty
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    # User's email, must be unique and cannot be empty
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    # User's password, cannot be empty
+    password = db.Column(db.String(120), nullable=False)
+    # User's role (admin, manager, or employee), defaults to 'employee'
+    role = db.Column(db.String(20), nullable=False, default='employee')
+    # Whether the user is approved by an admin, defaults to False
+    is_approved = db.Column(db.Boolean, default=False)
+
+    # Convert user object to a JSON-friendly dictionary
+    def to_json(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'role': self.role,
+            'is_approved': self.is_approved
+        }
+
+# Define the Task model for the database
+class Task(db.Model):
+    # Unique ID for each task
+    id = db.Column(db.Integer, primary_key=True)
+    # Task title, cannot be empty
+    title = db.Column(db.String(80), nullable=False)
+    # Task description, cannot be empty
+    description = db.Column(db.String(200), nullable=False)
+    # Task status (open, in progress, closed), cannot be empty
+    status = db.Column(db.String(20), nullable=False)
+    # Deadline for the task, cannot be empty
+    deadline = db.Column(db.DateTime, nullable=False)
+    # When the task was created, cannot be empty
+    created_at = db.Column(db.DateTime, nullable=False)
+    # ID of the user assigned to this task, links to the User table
+    assigned_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    # Convert task object to a JSON-friendly dictionary
+    def to_json(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'status': self.status,
+            'assigned_user_id': self.assigned_user_id,
+            'deadline': self.deadline.strftime('%Y-%m-%d %H:%M:%S'), # Format deadline for JSON
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') # Format creation time for JSON
+        }
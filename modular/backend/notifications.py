@@ -0,0 +1,360 @@
+import functools
+import json
+import queue
+import smtplib
+import threading
+import time
+import uuid
+
+from flask import current_app
+from jinja2 import StrictUndefined
+from jinja2.sandbox import SandboxedEnvironment
+
+from extensions import get_cache, get_celery, get_mail, get_or_create
+
+
+# ==========================
+# Bulk Notifications
+# ==========================
+# Subject and body are Jinja templates rendered once per recipient, so
+# "Hi {{ username }}" becomes a personal message. A bulk send runs as a Celery
+# task; its threads each keep one SMTP connection open and reuse it for every
+# message they send. The rate limit and the connection slots belong to the
+# app, so jobs running side by side share them. Delivery status is stored in
+# Redis, so any web worker can report it.
+
+# Templates come from managers, so they are rendered in a sandbox, and a
+# misspelled variable raises instead of silently rendering as ""
+_templates = SandboxedEnvironment(undefined=StrictUndefined)
+
+# Errors after which the SMTP connection can no longer be used
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+# Errors where the server answered with a status code for this message
+_SMTP_REFUSALS = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+# Job status is kept in Redis for this many seconds after the last update
+JOB_RETENTION = 24 * 3600
+
+
+def compile_templates(subject, body):
+    # Raises jinja2.TemplateError so callers can reject bad templates up front
+    return _templates.from_string(subject), _templates.from_string(body)
+
+
+class RateLimiter:
+    # Hands out evenly spaced send slots shared by all sender threads
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BulkSender:
+    # One per app: every bulk job takes its send slots from the same limiter and
+    # its SMTP connections from the same pool
+    def __init__(self, app):
+        self.limiter = RateLimiter(app.config['MAIL_BULK_RATE_LIMIT'])
+        self.connections = threading.BoundedSemaphore(app.config['MAIL_BULK_POOL_SIZE'])
+
+
+def get_bulk_sender(app=None):
+    app = app or current_app._get_current_object()
+    return get_or_create(app, 'lazy_bulk_sender', BulkSender)
+
+
+class BulkNotificationJob:
+    # Delivery status of every recipient of one bulk send, stored in Redis
+    def __init__(self, cache, job_id):
+        self.cache = cache
+        self.id = job_id
+        self.meta_key = f'bulk_notification:{job_id}'
+        self.status_key = f'bulk_notification:{job_id}:recipients'
+
+    @classmethod
+    def create(cls, cache, recipients):
+        job = cls(cache, uuid.uuid4().hex)
+        job.total = len(recipients)
+        pending = json.dumps({'status': 'pending', 'error': None})
+        pipe = cache.pipeline()
+        pipe.hset(job.meta_key, mapping={'state': 'queued', 'total': len(recipients), 'created_at': time.time()})
+        pipe.hset(job.status_key, mapping={r['email']: pending for r in recipients})
+        pipe.expire(job.meta_key, JOB_RETENTION)
+        pipe.expire(job.status_key, JOB_RETENTION)
+        pipe.execute()
+        return job
+
+    @classmethod
+    def load(cls, cache, job_id):
+        job = cls(cache, job_id)
+        return job if cache.exists(job.meta_key) else None
+
+    def set_state(self, state):
+        pipe = self.cache.pipeline()
+        pipe.hset(self.meta_key, 'state', state)
+        if state in ('finished', 'failed'):
+            pipe.hset(self.meta_key, 'finished_at', time.time())
+        pipe.expire(self.meta_key, JOB_RETENTION)
+        pipe.expire(self.status_key, JOB_RETENTION)
+        pipe.execute()
+
+    def mark(self, email, status, error=None):
+        self.cache.hset(self.status_key, email, json.dumps({'status': status, 'error': error}))
+
+    def sent_emails(self):
+        statuses = self.cache.hgetall(self.status_key)
+        return {email for email, state in statuses.items() if json.loads(state)['status'] == 'sent'}
+
+    def to_json(self):
+        meta = self.cache.hgetall(self.meta_key)
+        statuses = {email: json.loads(state) for email, state in self.cache.hgetall(self.status_key).items()}
+        counts = {'pending': 0, 'sent': 0, 'failed': 0}
+        for state in statuses.values():
+            counts[state['status']] += 1
+        return {
+            'job_id': self.id,
+            'state': meta.get('state'),
+            'total': int(meta.get('total', len(statuses))),
+            'counts': counts,
+            'recipients': statuses
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def _connection_class():
+    # Flask-Mail is only imported once something actually sends mail
+    from flask_mail import Connection
+
+    class TimeoutConnection(Connection):
+        # Flask-Mail opens smtplib.SMTP without a timeout, so a server that
+        # stops answering would block the sender thread forever
+        def __init__(self, mail, timeout):
+            super().__init__(mail)
+            self.timeout = timeout
+
+        def configure_host(self):
+            if self.mail.use_ssl:
+                host = smtplib.SMTP_SSL(self.mail.server, self.mail.port, timeout=self.timeout)
+            else:
+                host = smtplib.SMTP(self.mail.server, self.mail.port, timeout=self.timeout)
+            host.set_debuglevel(int(self.mail.debug))
+            if self.mail.use_tls:
+                host.starttls()
+            if self.mail.username and self.mail.password:
+                host.login(self.mail.username, self.mail.password)
+            return host
+
+        def is_open(self):
+            # smtplib closes the socket itself when the server answers 421
+            return self.host is None or self.host.sock is not None
+
+        def __exit__(self, exc_type, exc_value, tb):
+            # Leaving the block after the server hung up must not raise again
+            if self.host is not None and self.host.sock is not None:
+                try:
+                    self.host.quit()
+                except (smtplib.SMTPException, OSError):
+                    self.host.close()
+
+    return TimeoutConnection
+
+
+def _smtp_code(error):
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # Only one recipient per message, so there is exactly one refusal
+        return next(iter(error.recipients.values()))[0]
+    return error.smtp_code
+
+
+def _send_worker(app, work, subject_template, body_template, mark):
+    # Message() and Connection.send() both need the application context
+    with app.app_context():
+        from flask_mail import Message
+
+        mail = get_mail(app)
+        sender = get_bulk_sender(app)
+        connection_class = _connection_class()
+        timeout = app.config['MAIL_TIMEOUT']
+        max_retries = app.config['MAIL_BULK_MAX_RETRIES']
+        retry_delay = app.config['MAIL_BULK_RETRY_DELAY']
+
+        def next_message():
+            # Render the next recipient's message; ones that fail to render are marked failed
+            while True:
+                try:
+                    recipient = work.get_nowait()
+                except queue.Empty:
+                    return None
+                email = recipient['email']
+                try:
+                    msg = Message(
+                        subject=subject_template.render(**recipient),
+                        recipients=[email],
+                        body=body_template.render(**recipient)
+                    )
+                except Exception as e:
+                    mark(email, 'failed', str(e))
+                    continue
+                return email, msg, 0
+
+        def retry_or_fail(pending, error):
+            # Back off and hand the message back, or give up once its retries are used
+            email, msg, attempt = pending
+            if attempt < max_retries:
+                time.sleep(retry_delay * 2 ** attempt)
+                return email, msg, attempt + 1
+            mark(email, 'failed', str(error))
+            return None
+
+        def fail_remaining(pending, error):
+            # The server cannot be reached: fail this message and everything still queued
+            mark(pending[0], 'failed', str(error))
+            while True:
+                try:
+                    recipient = work.get_nowait()
+                except queue.Empty:
+                    return
+                mark(recipient['email'], 'failed', str(error))
+
+        # Hold one of the app's connection slots for as long as this thread sends
+        with sender.connections:
+            pending = None
+            # Failed attempts to open a connection in a row. They count against
+            # the server, not against the message waiting to be sent
+            connect_failures = 0
+            while True:
+                if pending is None:
+                    pending = next_message()
+                    if pending is None:
+                        return
+                connected = False
+                try:
+                    with connection_class(mail, timeout) as connection:
+                        connected = True
+                        connect_failures = 0
+                        # A closed connection sends us round the outer loop to reconnect
+                        while pending is not None and connection.is_open():
+                            email, msg, attempt = pending
+                            # Every attempt, retries included, takes a rate limit slot
+                            sender.limiter.wait()
+                            try:
+                                connection.send(msg)
+                            except _SMTP_REFUSALS as e:
+                                # 4xx is temporary (e.g. provider throttling), 5xx is final
+                                if 400 <= _smtp_code(e) < 500:
+                                    pending = retry_or_fail(pending, e)
+                                else:
+                                    mark(email, 'failed', str(e))
+                                    pending = None
+                            else:
+                                mark(email, 'sent')
+                                pending = None
+                            if pending is None:
+                                pending = next_message()
+                except _CONNECTION_ERRORS as e:
+                    if pending is None:
+                        continue
+                    if connected:
+                        # The server dropped the connection or stopped answering:
+                        # try the current message again on a new connection
+                        pending = retry_or_fail(pending, e)
+                    elif connect_failures < max_retries:
+                        # Could not connect: wait and try again with the same message
+                        time.sleep(retry_delay * 2 ** connect_failures)
+                        connect_failures += 1
+                    else:
+                        fail_remaining(pending, e)
+                        return
+                except Exception as e:
+                    if pending is None:
+                        continue
+                    if connected:
+                        mark(pending[0], 'failed', str(e))
+                        pending = None
+                    else:
+                        # No usable connection (e.g. TLS or login refused), which
+                        # will not get better by retrying
+                        fail_remaining(pending, e)
+                        return
+
+
+def run_bulk_job(app, recipients, subject_template, body_template, mark):
+    """Send one message per recipient and block until all of them are done.
+
+    mark(email, status, error) is called with 'sent' or 'failed' for each recipient.
+    """
+    work = queue.Queue()
+    for recipient in recipients:
+        work.put(recipient)
+
+    pool_size = max(1, min(app.config['MAIL_BULK_POOL_SIZE'], len(recipients)))
+    workers = [
+        threading.Thread(
+            target=_send_worker,
+            args=(app, work, subject_template, body_template, mark),
+            daemon=True
+        )
+        for _ in range(pool_size)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+# ==========================
+# Celery Task
+# ==========================
+def _create_bulk_task(app, celery):
+    # acks_late: the queue message is only acknowledged when the task returns,
+    # so a job whose worker dies is delivered again. Recipients already marked
+    # sent are skipped then; only a message sent just before the crash can go twice.
+    @celery.task(name="tasks.send_bulk_notification", acks_late=True, reject_on_worker_lost=True)
+    def send_bulk_notification(job_id, subject, body, recipients):
+        job = BulkNotificationJob(get_cache(app), job_id)
+        job.set_state('running')
+        sent = job.sent_emails()
+        try:
+            subject_template, body_template = compile_templates(subject, body)
+            remaining = [r for r in recipients if r['email'] not in sent]
+            run_bulk_job(app, remaining, subject_template, body_template, job.mark)
+        except Exception:
+            job.set_state('failed')
+            raise
+        job.set_state('finished')
+
+    return send_bulk_notification
+
+
+def get_bulk_task(app=None):
+    """Return the bulk send task registered on the app's Celery instance."""
+    app = app or current_app._get_current_object()
+    # Build Celery before taking the task's init lock
+    celery = get_celery(app)
+    return get_or_create(app, 'lazy_bulk_task', lambda app: _create_bulk_task(app, celery))
+
+
+def start_bulk_job(app, recipients, subject, body):
+    """Record the job in Redis, queue it for the worker and return it for polling."""
+    # One message per email address, later duplicates are dropped
+    recipients = list({r['email']: r for r in recipients}.values())
+    job = BulkNotificationJob.create(get_cache(app), recipients)
+    get_bulk_task(app).apply_async(
+        args=(job.id, subject, body, recipients),
+        queue=app.config['MAIL_BULK_QUEUE']
+    )
+    return job
+
+
+def get_job(job_id):
+    return BulkNotificationJob.load(get_cache(), job_id)
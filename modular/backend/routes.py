@@ -0,0 +1,408 @@
+import os
+from datetime import datetime
+
+from flask import current_app, jsonify, request
+from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
+from flask_restful import Resource
+from jinja2 import TemplateError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from extensions import db, get_upload_folder
+from models import User, Task
+from notifications import compile_templates, get_job, start_bulk_job
+
+
+# Helper function to get the current logged-in user
+def get_current_user():
+    # Get the username from the JWT token
+    username = get_jwt_identity()
+    # Find the user in the database by username
+    user = User.query.filter_by(username=username).first()
+    return user
+
+# Decorator to restrict access based on user roles
+def role_required(allowed_roles=["admin"]):
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            # Get the current user
+            user = get_current_user()
+            # If user is not found, return an error
+            if user is None:
+                return {"message": "User not found"}, 401
+            # If the user's role is not in the allowed roles, return an error
+            if user.role not in allowed_roles:
+                return {"message": "Unauthorized access"}, 403
+            # If role is allowed, execute the original function
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Resource for a simple hello world endpoint
+class HelloWorld(Resource):
+    # Handle GET requests
+    def get(self):
+        return {"msg":'get from hello world'}
+    
+    # Handle POST requests, requires JWT authentication
+    @jwt_required()
+    def post(self):
+        # Get the identity (username) from the JWT token
+        user_name = get_jwt_identity()
+        return {'message': 'Hello ' + user_name}
+
+# Resource for user signup
+class SignupResource(Resource):
+    # Handle POST requests to create a new user
+    def post(self):
+        # Get user data from the request body
+        data = request.get_json()
+
+        # Create a new User object
+        new_user = User(
+            username=data['username'],
+            email=data['email'],
+            password=generate_password_hash(data['password']),
+            role=data['role'] # Role is set to default 'employee' upon signup
+        )
+        # Add the new user to the database session
+        db.session.add(new_user)
+        # Save changes to the database
+        db.session.commit()
+        # Return the new user's details as JSON with a 201 Created status
+        return new_user.to_json(), 201
+    
+# Resource for user login
+class LoginResource(Resource):
+    # Handle POST requests for user login
+    def post(self):
+        # Get login credentials from the request body
+        data = request.get_json()
+        # Find the user in the database by email and password
+        user = User.query.filter_by(email=data['email']).first()
+        if not check_password_hash(user.password, data['password']):
+            return {'message': 'Invalid credentials'}, 401
+
+        # If user exists and is approved, create an access token
+        if user and user.is_approved:
+            access_token = create_access_token(identity=user.username)
+            return {
+                'token': access_token,
+                'message': 'Successfully logged in',
+                'role': user.role # <--- ADD THIS LINE
+            }, 200
+        elif user and not user.is_approved:
+            return {'message': 'Account not approved by admin. Please wait for approval.'}, 403
+        else:
+            # If user not found or credentials invalid
+            return {'message': 'Invalid credentials'}, 401
+        
+    # Handle GET requests, requires JWT authentication
+    @jwt_required()
+    def get(self):
+        return {"message":'success'}, 200
+
+
+class AllUsersResource(Resource):
+    # Handle GET requests to retrieve all users
+    @jwt_required()
+    @role_required(['admin', 'manager'])  # Only admin can view all users
+    def get(self):
+        users = User.query.all()  # Get all users from the database
+        all_users = []
+        # Convert user objects to a list of JSON-friendly dictionaries
+        for user in users:
+            user_details = {'user_id': user.id, 'username': user.username, 'email': user.email, 'role': user.role}
+            all_users.append(user_details)
+        return jsonify(all_users)
+
+
+# Resource for managing users (mainly for admin)
+class UsersResource(Resource):
+    # Handle GET requests to see unapproved users
+    @jwt_required()
+    @role_required(['admin'])
+    def get(self):
+        print("Fetching unapproved users")
+        # Get all users who are not yet approved
+        users = User.query.filter_by(is_approved=False).all()
+        all_users = []
+        # Convert user objects to a list of JSON-friendly dictionaries
+        for user in users:
+            user_details = {'user_id': user.id, 'username': user.username, 'email': user.email, 'role': user.role}
+            all_users.append(user_details)
+        return jsonify(all_users)
+
+    # Handle POST requests to approve a user
+    @jwt_required()
+    @role_required(['admin'])
+    def post(self):
+        # Get user ID from the request body
+        data = request.json
+        user_id = data['user_id']
+        # Find the user by ID
+        user = User.query.get(user_id)
+        # If user exists, approve them and save changes
+        if user:
+            user.is_approved = True
+            db.session.commit()
+            return {"msg": "Successfully approved the user"}, 200
+        # If user not found
+        return {"msg": "User not found"}, 404
+    
+    # Handle PUT requests to update user role
+    @jwt_required()
+    @role_required(['admin'])
+    def put(self):
+        data = request.json
+        user_id = data.get('user_id')
+        new_role = data.get('role')
+
+        if not user_id or not new_role:
+            return {"msg": "User ID and new role are required"}, 400
+
+        user = User.query.get(user_id)
+        if not user:
+            return {"msg": "User not found"}, 404
+        
+        # Ensure the new role is valid
+        if new_role not in ['admin', 'manager', 'employee']:
+            return {"msg": "Invalid role specified. Must be 'admin', 'manager', or 'employee'."}, 400
+
+        user.role = new_role
+        db.session.commit()
+        return {"msg": f"User {user.username} role updated to {new_role} successfully"}, 200
+
+
+    # Handle DELETE requests to delete a user
+    @jwt_required()
+    @role_required(['admin'])
+    def delete(self):
+        # Get user ID from the request body
+        data = request.json
+        user_id = data['user_id']
+        # Find the user by ID
+        user = User.query.get(user_id)
+        # If user not found, return an error
+        if not user:
+            return {"msg": "User not found"}, 404
+        # Delete the user and save changes
+        db.session.delete(user)
+        db.session.commit()
+        return {"msg":"User deleted successfully"}, 200
+
+# Resource for managing tasks
+class TaskResource(Resource):
+    # Handle GET requests to retrieve tasks
+    @jwt_required()
+    @role_required(["admin", "manager", "employee"]) # All roles can view tasks
+    def get(self, task_id=None):
+        current_user = get_current_user()
+
+        if current_user.role == 'employee':
+            # Employee can only see their own tasks
+            if task_id:
+                task = Task.query.filter_by(id=task_id, assigned_user_id=current_user.id).first()
+                if not task:
+                    return {"message": "Task not found or not assigned to you"}, 404
+                return task.to_json()
+            else:
+                tasks = Task.query.filter_by(assigned_user_id=current_user.id).all()
+                all_tasks = [task.to_json() for task in tasks]
+                return all_tasks
+        else: # Admin and Manager can see all tasks or specific tasks
+            if task_id:
+                task = Task.query.get(task_id)
+                if not task:
+                    return {"message": "Task not found"}, 404
+                return task.to_json()
+            
+            tasks = Task.query.all()
+            all_tasks = [task.to_json() for task in tasks]
+            return all_tasks
+    
+    # Handle POST requests to create a new task
+    @jwt_required()
+    @role_required(["admin", "manager"]) # Only admin and manager can create tasks
+    def post(self):
+        # Get task data from the request body
+        data = request.json
+        title = data['title']
+        description = data['description']
+        status = data['status']
+        assigned_user_id = data['assigned_user_id']
+        deadline = data['deadline']
+        # Convert deadline string to datetime object
+        deadline = datetime.strptime(deadline, '%Y-%m-%d %H:%M:%S')
+
+        # Create a new Task object
+        task = Task(
+            title=title,
+            description=description,
+            status=status,
+            assigned_user_id=assigned_user_id,
+            deadline=deadline,
+            created_at=datetime.now()
+        )
+        # Add the new task to the database session
+        db.session.add(task)
+        # Save changes to the database
+        db.session.commit()
+        return {"msg": "Task created successfully"}, 201
+
+    # Handle PUT requests to update a task
+    @jwt_required()
+    @role_required(["admin", "manager", "employee"]) # All roles can update tasks, but with restrictions
+    def put(self, task_id):
+        current_user = get_current_user()
+        task = Task.query.get(task_id)
+
+        if not task:
+            return {"message": "Task not found"}, 404
+
+        data = request.json
+
+        if current_user.role == 'employee':
+            # Employee can only update status of their assigned tasks
+            if task.assigned_user_id != current_user.id:
+                return {"message": "You can only update tasks assigned to you"}, 403
+            
+            if 'status' in data:
+                task.status = data['status']
+            else:
+                return {"message": "Employees can only update task status"}, 400
+        else: # Admin and Manager can update all fields
+            if 'title' in data:
+                task.title = data['title']
+            if 'description' in data:
+                task.description = data['description']
+            if 'status' in data:
+                task.status = data['status']
+            if 'assigned_user_id' in data:
+                task.assigned_user_id = data['assigned_user_id']
+            if 'deadline' in data:
+                task.deadline = datetime.strptime(data['deadline'], '%Y-%m-%d %H:%M:%S')
+        
+        db.session.commit()
+        return {"msg": "Task updated successfully"}, 200
+
+    # Handle DELETE requests to delete a task
+    @jwt_required()
+    @role_required(["admin", "manager"]) # Only admin and manager can delete tasks
+    def delete(self, task_id):
+        # Find the task by ID
+        task = Task.query.get(task_id)
+        # If task not found, return an error
+        if not task:
+            return {"msg": "Task not found"}, 404
+        # Delete the task and save changes
+        db.session.delete(task)
+        db.session.commit()
+        return {"msg": "Task deleted successfully"}, 200
+
+# Resource for uploading documents
+class UploadDocumentResource(Resource):
+    # Handle POST requests to save an uploaded file
+    @jwt_required()
+    def post(self):
+        if 'document' not in request.files:
+            return {'message': 'No file part in the request'}, 400
+        file = request.files['document']
+        if file.filename == '':
+            return {'message': 'No selected file'}, 400
+        # Optionally, you can add more validation here (e.g., allowed file types)
+        filename = file.filename
+        # The upload directory is only created the first time a file arrives
+        save_path = os.path.join(get_upload_folder(), filename)
+        file.save(save_path)
+        return {'message': 'File uploaded successfully', 'filename': filename}, 200
+
+
+# Resource for sending personalised emails to many users at once
+class BulkNotificationResource(Resource):
+    # Handle GET requests to check the delivery status of a bulk send
+    @jwt_required()
+    @role_required(["admin", "manager"])
+    def get(self, job_id):
+        try:
+            job = get_job(job_id)
+            if not job:
+                return {"message": "Notification job not found"}, 404
+            return job.to_json(), 200
+        except Exception as e:
+            return {"message": f"Redis Error: {str(e)}"}, 500
+
+    # Handle POST requests to start a bulk send
+    # Body: {"subject": "...", "body": "Hi {{ username }}...", "user_ids": [...],
+    #        "context": {...}, "user_context": {"<user_id>": {...}}}
+    @jwt_required()
+    @role_required(["admin", "manager"])
+    def post(self):
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return {"message": "Request body must be a JSON object"}, 400
+        subject = data.get('subject')
+        body = data.get('body')
+        if not subject or not body or not isinstance(subject, str) or not isinstance(body, str):
+            return {"message": "Subject and body are required"}, 400
+        user_ids = data.get('user_ids')
+        if user_ids is not None and (
+            not isinstance(user_ids, list)
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in user_ids)
+        ):
+            return {"message": "user_ids must be a list of user IDs"}, 400
+        if user_ids == []:
+            # An empty list must not fall back to emailing every employee
+            return {"message": "user_ids must not be empty"}, 400
+        shared_context = data.get('context', {})
+        if not isinstance(shared_context, dict):
+            return {"message": "context must be an object"}, 400
+        user_context = data.get('user_context', {})
+        if not isinstance(user_context, dict) or not all(isinstance(c, dict) for c in user_context.values()):
+            return {"message": "user_context must map user IDs to objects"}, 400
+        try:
+            subject_template, body_template = compile_templates(subject, body)
+        except TemplateError as e:
+            return {"message": f"Invalid template: {e}"}, 400
+
+        # Notify the given users, or every approved employee if user_ids is left out
+        if user_ids is not None:
+            users = User.query.filter(User.id.in_(user_ids)).all()
+        else:
+            users = User.query.filter_by(role='employee', is_approved=True).all()
+        if not users:
+            return {"message": "No recipients found"}, 404
+
+        # Template variables: the user's fields, the shared context and the
+        # per-user context (e.g. the tasks that were reassigned to them)
+        recipients = []
+        for user in users:
+            recipient = dict(shared_context)
+            recipient.update(user_context.get(str(user.id), {}))
+            recipient.update(user.to_json())
+            recipients.append(recipient)
+
+        # Render once before queuing so a misspelled variable or a blocked
+        # expression is rejected here instead of failing for every recipient
+        try:
+            subject_template.render(**recipients[0])
+            body_template.render(**recipients[0])
+        except TemplateError as e:
+            return {"message": f"Invalid template: {e}"}, 400
+
+        try:
+            job = start_bulk_job(current_app._get_current_object(), recipients, subject, body)
+        except Exception as e:
+            return {"message": f"Could not queue notification job: {str(e)}"}, 500
+        return {"job_id": job.id, "total": job.total}, 202
+
+
+# Add API resources to specific URLs
+def register_routes(api):
+    api.add_resource(HelloWorld, '/') # Home endpoint
+    api.add_resource(SignupResource, '/signup') # User signup endpoint
+    api.add_resource(LoginResource, '/login') # User login endpoint
+    api.add_resource(UsersResource,'/admin/users', '/admin/users/<int:user_id>') # Admin user management endpoint
+    api.add_resource(TaskResource, '/task', '/task/<int:task_id>') # Task management endpoint
+    api.add_resource(AllUsersResource, '/all_users') # Endpoint to get all users (for admin and manager)
+    api.add_resource(UploadDocumentResource, '/upload_document') # Document upload endpoint
+    api.add_resource(BulkNotificationResource, '/notifications/bulk', '/notifications/bulk/<string:job_id>') # Bulk email endpoint
@@ -0,0 +1,96 @@
+import argparse
+import socketserver
+import threading
+import time
+
+
+# ==========================
+# Local SMTP Sink
+# ==========================
+# A minimal SMTP server that accepts every message and throws it away, for
+# throughput tests of the bulk notification sender without a real provider.
+# Usage: python smtp_sink.py --port 8025
+# then run the app with MAIL_SERVER=localhost MAIL_PORT=8025 MAIL_USE_TLS=0.
+class SinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 localhost SMTP sink ready')
+        delivered = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 localhost')
+            elif command.startswith('MAIL') and delivered == self.server.drop_after:
+                # Hang up without answering, like a server closing an idle connection
+                return
+            elif command.startswith('RCPT'):
+                self.reply(self.server.rcpt_reply(command))
+            elif command.startswith(('MAIL', 'RSET', 'NOOP')):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                # Read and discard the message up to the lone "." line
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                self.server.count_message()
+                delivered += 1
+                self.reply('250 OK queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    # drop_after: hang up on each connection after it has delivered this many messages
+    # rcpt_replies: {address: [codes]} answers RCPT TO with the next code in the list
+    # (e.g. [451] refuses once, then accepts)
+    def __init__(self, host='localhost', port=0, drop_after=None, rcpt_replies=None):
+        super().__init__((host, port), SinkHandler)
+        self.received = 0
+        self.drop_after = drop_after
+        self.rcpt_replies = {a.lower(): list(c) for a, c in (rcpt_replies or {}).items()}
+        self.lock = threading.Lock()
+
+    def count_message(self):
+        with self.lock:
+            self.received += 1
+
+    def rcpt_reply(self, command):
+        address = command.split(':', 1)[-1].strip().strip('<>').lower()
+        with self.lock:
+            codes = self.rcpt_replies.get(address)
+            code = codes.pop(0) if codes else 250
+        return f'{code} OK' if code == 250 else f'{code} Recipient refused by sink'
+
+
+def start_sink(host='localhost', port=0, **options):
+    """Start the sink in a background thread; port 0 picks a free port."""
+    sink = SMTPSink(host, port, **options)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    return sink
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local SMTP server that discards all mail.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8025)
+    args = parser.parse_args()
+
+    sink = start_sink(args.host, args.port)
+    print(f"SMTP sink listening on {args.host}:{sink.server_address[1]}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"messages received: {sink.received}")
+    except KeyboardInterrupt:
+        sink.shutdown()
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+
+def test_create_app_does_not_load_optional_subsystems():
+    # A fresh interpreter, since other tests import these modules on purpose
+    probe = (
+        "import sys\n"
+        "from app import create_app\n"
+        "create_app().test_client().get('/')\n"
+        "print(sorted({'flask_mail', 'celery', 'redis'} & set(sys.modules)))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == '[]'
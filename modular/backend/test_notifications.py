@@ -0,0 +1,278 @@
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('flask_mail')
+
+from app import create_app, create_admin
+from config import Config
+from extensions import db, get_cache, get_mail
+from models import User
+from notifications import (
+    BulkNotificationJob, compile_templates, get_bulk_sender, get_bulk_task, run_bulk_job, start_bulk_job
+)
+from smtp_sink import start_sink
+
+
+def make_app(port, **settings):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        MAIL_SERVER = 'localhost'
+        MAIL_PORT = port
+        MAIL_USE_TLS = False
+        MAIL_USERNAME = None
+        MAIL_PASSWORD = None
+        MAIL_DEFAULT_SENDER = 'tests@localhost'
+        MAIL_TIMEOUT = 2
+        MAIL_BULK_RATE_LIMIT = 0
+        MAIL_BULK_RETRY_DELAY = 0.01
+
+    for key, value in settings.items():
+        setattr(TestConfig, key, value)
+    return create_app(TestConfig)
+
+
+def send(app, emails):
+    # Run a bulk send and return {email: (status, error)}
+    statuses = {}
+
+    def mark(email, status, error=None):
+        statuses[email] = (status, error)
+
+    recipients = [{'email': email, 'username': email.split('@')[0]} for email in emails]
+    run_bulk_job(app, recipients, *compile_templates('Hi {{ username }}', 'Body for {{ email }}'), mark)
+    return statuses
+
+
+@pytest.fixture
+def sink():
+    sink = start_sink()
+    yield sink
+    sink.shutdown()
+
+
+def test_sends_one_message_per_recipient(sink):
+    app = make_app(sink.server_address[1], MAIL_BULK_POOL_SIZE=3)
+    emails = [f'user{i}@example.com' for i in range(20)]
+
+    with app.app_context(), get_mail(app).record_messages() as outbox:
+        statuses = send(app, emails)
+
+    assert statuses == {email: ('sent', None) for email in emails}
+    assert sink.received == 20
+    assert sorted(msg.subject for msg in outbox) == sorted(f'Hi user{i}' for i in range(20))
+
+
+def test_reconnects_when_server_drops_connection():
+    dropping = start_sink(drop_after=3)
+    try:
+        app = make_app(dropping.server_address[1], MAIL_BULK_POOL_SIZE=2)
+        emails = [f'user{i}@example.com' for i in range(10)]
+        statuses = send(app, emails)
+    finally:
+        dropping.shutdown()
+
+    assert statuses == {email: ('sent', None) for email in emails}
+    assert dropping.received == 10
+
+
+def test_temporary_refusals_are_retried_and_permanent_ones_fail():
+    sink = start_sink(rcpt_replies={
+        'slow@example.com': [451, 421],
+        'gone@example.com': [550],
+        'busy@example.com': [450, 450, 450],
+    })
+    try:
+        app = make_app(sink.server_address[1], MAIL_BULK_POOL_SIZE=1, MAIL_BULK_MAX_RETRIES=2)
+        statuses = send(app, ['slow@example.com', 'gone@example.com', 'busy@example.com', 'ok@example.com'])
+    finally:
+        sink.shutdown()
+
+    assert statuses['slow@example.com'] == ('sent', None)
+    assert statuses['ok@example.com'] == ('sent', None)
+    assert statuses['gone@example.com'][0] == 'failed'
+    assert '550' in statuses['gone@example.com'][1]
+    assert statuses['busy@example.com'][0] == 'failed'
+    assert '450' in statuses['busy@example.com'][1]
+    assert sink.received == 2
+
+
+def test_unresponsive_server_times_out():
+    # Accepts connections but never sends the SMTP greeting
+    server = socket.socket()
+    server.bind(('localhost', 0))
+    server.listen()
+    try:
+        app = make_app(server.getsockname()[1], MAIL_TIMEOUT=0.2, MAIL_BULK_MAX_RETRIES=0)
+        start = time.monotonic()
+        statuses = send(app, ['user@example.com'])
+    finally:
+        server.close()
+
+    assert statuses['user@example.com'][0] == 'failed'
+    assert time.monotonic() - start < 5
+
+
+def test_unreachable_server_fails_the_queue_without_backing_off_per_message():
+    # Grab a free port and close it again so connections are refused
+    closed = socket.socket()
+    closed.bind(('localhost', 0))
+    port = closed.getsockname()[1]
+    closed.close()
+
+    app = make_app(port, MAIL_BULK_POOL_SIZE=2, MAIL_BULK_MAX_RETRIES=2, MAIL_BULK_RETRY_DELAY=0.2)
+    emails = [f'user{i}@example.com' for i in range(50)]
+    start = time.monotonic()
+    statuses = send(app, emails)
+
+    # One backoff of 0.2s + 0.4s per sender thread, not per recipient (~15s)
+    assert time.monotonic() - start < 3
+    assert set(statuses) == set(emails)
+    assert all(status == 'failed' for status, error in statuses.values())
+
+
+def test_concurrent_jobs_share_the_rate_limit(sink):
+    app = make_app(sink.server_address[1], MAIL_BULK_RATE_LIMIT=50, MAIL_BULK_POOL_SIZE=4)
+    assert get_bulk_sender(app) is get_bulk_sender(app)
+
+    jobs = [
+        threading.Thread(target=send, args=(app, [f'job{j}-{i}@example.com' for i in range(10)]))
+        for j in range(2)
+    ]
+    start = time.monotonic()
+    for job in jobs:
+        job.start()
+    for job in jobs:
+        job.join()
+
+    # 20 messages at 50 per second take at least 19 intervals of 20ms
+    assert time.monotonic() - start >= 0.38
+    assert sink.received == 20
+
+
+# ==========================
+# API
+# ==========================
+@pytest.fixture
+def api(sink, monkeypatch):
+    pytest.importorskip('celery')
+    redis = pytest.importorskip('redis')
+    fakeredis = pytest.importorskip('fakeredis')
+
+    # get_cache() still builds its client lazily, just an in-memory one
+    monkeypatch.setattr(redis, 'StrictRedis', fakeredis.FakeStrictRedis)
+    # Run the bulk task inside the request instead of on a worker
+    app = make_app(sink.server_address[1], CELERY_TASK_ALWAYS_EAGER=True)
+    create_admin(app)
+    with app.app_context():
+        for i in range(3):
+            db.session.add(User(username=f'emp{i}', email=f'emp{i}@example.com', password='x', is_approved=True))
+        db.session.commit()
+
+    client = app.test_client()
+    token = client.post('/login', json={'email': 'admin@mail.com', 'password': 'admin@123'}).json['token']
+    client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + token
+    return app, client
+
+
+def test_bulk_endpoint_sends_and_reports_status(api, sink):
+    app, client = api
+    response = client.post('/notifications/bulk', json={
+        'subject': 'Reassigned: {{ task }}',
+        'body': 'Hi {{ username }}, {{ note }}',
+        'context': {'note': 'see the dashboard', 'task': 'none'},
+        'user_context': {'2': {'task': 'Ship release'}}
+    })
+    assert response.status_code == 202
+    assert response.json['total'] == 3
+
+    status = client.get(f"/notifications/bulk/{response.json['job_id']}").json
+    assert status['state'] == 'finished'
+    assert status['counts'] == {'pending': 0, 'sent': 3, 'failed': 0}
+    assert set(status['recipients']) == {'emp0@example.com', 'emp1@example.com', 'emp2@example.com'}
+    assert sink.received == 3
+
+
+def test_first_bulk_send_on_a_cold_app_completes(api, sink):
+    app, client = api
+    assert not {'lazy_mail', 'lazy_celery', 'lazy_cache', 'lazy_bulk_task'} & set(app.extensions)
+
+    # Post from a thread so a deadlock in the lazy getters fails instead of hanging
+    responses = []
+    thread = threading.Thread(
+        target=lambda: responses.append(client.post('/notifications/bulk', json={'subject': 'Hi', 'body': 'x'})),
+        daemon=True
+    )
+    thread.start()
+    thread.join(timeout=10)
+
+    assert responses and responses[0].status_code == 202
+    assert sink.received == 3
+
+
+def test_unknown_job_is_not_found(api):
+    app, client = api
+    assert client.get('/notifications/bulk/missing').status_code == 404
+
+
+def test_duplicate_recipients_are_sent_once(api, sink):
+    app, client = api
+    recipients = [{'email': 'same@example.com', 'username': 'a'}, {'email': 'same@example.com', 'username': 'b'}]
+    with app.app_context():
+        job = start_bulk_job(app, recipients, 'Hi', '{{ username }}')
+        assert job.total == 1
+        assert BulkNotificationJob.load(job.cache, job.id).to_json()['counts']['sent'] == 1
+    assert sink.received == 1
+
+
+@pytest.mark.parametrize('payload, message', [
+    ({'subject': 'Hi {{ username', 'body': 'x'}, 'Invalid template'),
+    ({'subject': 'Hi {{ usernme }}', 'body': 'x'}, "'usernme' is undefined"),
+    ({'subject': 'Hi', 'body': '{{ "".__class__ }}'}, 'unsafe'),
+    ({'subject': 'Hi', 'body': 'x', 'context': 'x'}, 'context must be an object'),
+    ({'subject': 'Hi', 'body': 'x', 'user_context': []}, 'user_context must map'),
+    ({'subject': 'Hi', 'body': 'x', 'user_ids': '1'}, 'user_ids must be a list'),
+    ({'subject': 'Hi', 'body': 'x', 'user_ids': []}, 'user_ids must not be empty'),
+    ({'body': 'x'}, 'Subject and body are required'),
+])
+def test_bulk_endpoint_rejects_bad_requests(api, sink, payload, message):
+    app, client = api
+    response = client.post('/notifications/bulk', json=payload)
+    assert response.status_code == 400
+    assert message in response.json['message']
+    assert sink.received == 0
+
+
+def test_redelivered_job_skips_recipients_already_sent(api, sink):
+    app, client = api
+    recipients = [{'email': f'user{i}@example.com', 'username': f'user{i}'} for i in range(3)]
+    with app.app_context():
+        task = get_bulk_task(app)
+        assert task.acks_late and task.reject_on_worker_lost
+        # As left behind by a worker that died after the first message
+        job = BulkNotificationJob.create(get_cache(app), recipients)
+        job.mark('user0@example.com', 'sent')
+        job.set_state('running')
+
+        task.apply(args=(job.id, 'Hi', '{{ username }}', recipients))
+        status = job.to_json()
+
+    assert status['state'] == 'finished'
+    assert status['counts'] == {'pending': 0, 'sent': 3, 'failed': 0}
+    assert sink.received == 2
+
+
+def test_crashed_job_is_reported_as_failed(api, sink):
+    app, client = api
+    recipients = [{'email': 'user@example.com', 'username': 'user'}]
+    with app.app_context():
+        job = BulkNotificationJob.create(get_cache(app), recipients)
+        result = get_bulk_task(app).apply(args=(job.id, 'Hi {{', 'x', recipients))
+        status = job.to_json()
+
+    assert result.failed()
+    assert status['state'] == 'failed'
+    assert status['counts']['pending'] == 1
+    assert sink.received == 0
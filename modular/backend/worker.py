@@ -0,0 +1,21 @@
+from app import create_app
+from extensions import get_celery
+from notifications import get_bulk_task
+
+
+# ==========================
+# Celery Worker Entry Point
+# ==========================
+# Only the worker process builds Celery up front; web workers create it on
+# first use through get_celery().
+#
+#   celery -A worker.celery worker --loglevel=info
+#
+# Bulk notifications go to their own queue. Run exactly one process for it, so
+# the rate limit and connection pool apply to all bulk jobs together:
+#
+#   celery -A worker.celery worker -Q bulk_email --pool threads --concurrency 4
+flask_app = create_app()
+celery = get_celery(flask_app)
+# Register the tasks with the worker
+get_bulk_task(flask_app)